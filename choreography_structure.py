@@ -8,7 +8,8 @@
 #
 # No search logic here.
 
-from typing import List
+from functools import lru_cache
+from typing import List, Tuple
 
 from pose_definitions import (
     Pose,
@@ -35,11 +36,15 @@ ABSOLUTE_MAX_SECONDS: float = 117.0
 # Mandatory order (fixed)
 # ---------------------------------------------------------------
 
-def mandatory_order() -> List[Pose]:
+@lru_cache(maxsize=1)
+def mandatory_order() -> Tuple[Pose, ...]:
     """
-    Returns the ordered list of mandatory poses that define the
+    Returns the ordered tuple of mandatory poses that define the
     backbone of the choreography.
 
+    The result is built once and cached; it is a tuple so that the
+    shared object cannot be mutated by callers.
+
     Fixed inner order:
         StandInit ->
         Sit ->
@@ -50,16 +55,17 @@ def mandatory_order() -> List[Pose]:
         StandZero ->
         Crouch
     """
-    return [
+    inner = {p.label: p for p in inner_mandatory_poses()}
+    return (
         initial_pose(),        # StandInit
-        next(p for p in inner_mandatory_poses() if p.label == "hello"),
-        next(p for p in inner_mandatory_poses() if p.label == "stand_zero"),
-        next(p for p in inner_mandatory_poses() if p.label == "sit"),
-        next(p for p in inner_mandatory_poses() if p.label == "sit_relax"),
-        next(p for p in inner_mandatory_poses() if p.label == "stand"),
-        next(p for p in inner_mandatory_poses() if p.label == "wipe_forehead"),
+        inner["hello"],
+        inner["stand_zero"],
+        inner["sit"],
+        inner["sit_relax"],
+        inner["stand"],
+        inner["wipe_forehead"],
         final_pose(),          # Crouch
-    ]
+    )
 
 
 # ---------------------------------------------------------------
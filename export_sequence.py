@@ -19,9 +19,8 @@ def main():
     print(f"Total duration: {total_duration(seq):.2f}s")
 
     # Write only file_ids, one per line, for Choregraphe
-    with open(OUTPUT_PATH, "w") as f:
-        for p in seq:
-            f.write(p.file_id + "\n")
+    with open(OUTPUT_PATH, "wb") as f:
+        f.writelines(p.file_line for p in seq)
 
     print(f"Exported {len(seq)} poses to {OUTPUT_PATH}")
 
@@ -7,12 +7,15 @@
 #
 # This file is pure planning logic – no NAOqi, no file I/O.
 
-from collections import deque
+import heapq
+import math
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
 
 from pose_definitions import (
     Pose,
+    NUM_STATE_BITS,
     all_intermediate_poses,
     total_duration,
 )
@@ -23,8 +26,8 @@ from choreography_structure import (
     ABSOLUTE_MAX_SECONDS,
 )
 
-# Small logical state is just a dict[str, bool], e.g. {"standing": True}
-State = Dict[str, bool]
+# Small logical state packed into an int (see "Utilities for logical state").
+State = int
 
 
 @dataclass(frozen=True)
@@ -48,13 +51,19 @@ REQUIRED_INTERMEDIATE_FILE_IDS: List[str] = [
 ]
 
 
-def required_intermediate_poses() -> List[Pose]:
+@lru_cache(maxsize=1)
+def _intermediates_by_id() -> Dict[str, Pose]:
+    """file_id -> Pose for the intermediate pool (cached; do not mutate)."""
+    return {p.file_id: p for p in all_intermediate_poses()}
+
+
+@lru_cache(maxsize=1)
+def required_intermediate_poses() -> Tuple[Pose, ...]:
     """
     Resolve the fixed 5 required intermediates by file_id from the full
-    intermediate pool.
+    intermediate pool. Resolved once and cached (returned as a tuple).
     """
-    pool = all_intermediate_poses()
-    by_id = {p.file_id: p for p in pool}
+    by_id = _intermediates_by_id()
     result: List[Pose] = []
     for fid in REQUIRED_INTERMEDIATE_FILE_IDS:
         pose = by_id.get(fid)
@@ -65,42 +74,69 @@ def required_intermediate_poses() -> List[Pose]:
             )
         else:
             result.append(pose)
-    return result
+    return tuple(result)
 
 
-def required_poses_for_time_check() -> List[Pose]:
+@lru_cache(maxsize=1)
+def required_poses_for_time_check() -> Tuple[Pose, ...]:
     """
     The "required positions" used in the hard-cap feasibility check:
     all mandatory poses (from mandatory_order()) + the fixed 5 intermediates.
     """
-    mand = mandatory_order()
-    interms = required_intermediate_poses()
-    return mand + interms
+    return mandatory_order() + required_intermediate_poses()
+
+
+@lru_cache(maxsize=1)
+def _mandatory_raw_time() -> float:
+    """Total raw duration of mandatory_order()."""
+    return total_duration(mandatory_order())
+
+
+@lru_cache(maxsize=1)
+def _required_raw_time() -> float:
+    """Total raw duration of required_poses_for_time_check()."""
+    return total_duration(required_poses_for_time_check())
 
 
 # -------------------------------------------------------------------
 # Utilities for logical state
 # -------------------------------------------------------------------
+#
+# The logical state (e.g. {"standing": True}) is packed into one int:
+#     low NUM_STATE_BITS bits   -> value of each key, using the bit
+#                                  layout of pose_definitions (STANDING, ...)
+#     same bits << _KNOWN_SHIFT -> the key is known (set by some pose)
+# so the empty state {} is 0, and keys that were never set do not
+# constrain preconditions, exactly like the old dict representation.
+# Poses carry their pre/post conditions as pre_mask/pre_val and
+# post_mask/post_val in the value-bit layout.
+
+_KNOWN_SHIFT = NUM_STATE_BITS
+
+
+def _post_clear_set(post_mask: int, post_val: int) -> Tuple[int, int]:
+    """
+    Turn post masks into (clear, set) so that applying a pose is
+    (state & ~clear) | set: written keys get their value and become known.
+    """
+    known = post_mask << _KNOWN_SHIFT
+    return post_mask | known, post_val | known
+
 
 def apply_pose(state: State, pose: Pose) -> State:
     """
-    Apply pose.post to the state and return a new state dict.
+    Apply pose.post to the state and return the new state.
     """
-    new_state = dict(state)
-    for k, v in pose.post.items():
-        new_state[k] = v
-    return new_state
+    post_clear, post_set = _post_clear_set(pose.post_mask, pose.post_val)
+    return (state & ~post_clear) | post_set
 
 
-def state_satisfies(state: State, req: Dict[str, bool]) -> bool:
+def state_satisfies(state: State, pose: Pose) -> bool:
     """
-    Check if 'state' satisfies all requirements in 'req'.
-    Empty req means "no constraint".
+    Check if 'state' satisfies all preconditions in pose.pre.
+    Keys not yet known in 'state' do not constrain anything.
     """
-    for k, v in req.items():
-        if k in state and state[k] != v:
-            return False
-    return True
+    return ((state ^ pose.pre_val) & pose.pre_mask & (state >> _KNOWN_SHIFT)) == 0
 
 
 # -------------------------------------------------------------------
@@ -110,10 +146,196 @@ def state_satisfies(state: State, req: Dict[str, bool]) -> bool:
 MAX_INTERMEDIATES_PER_SEGMENT = 6
 
 
+def _reachable_bits_within(pool: Sequence[Pose], max_depth: int) -> List[Tuple[int, int]]:
+    """
+    reach[k] = (can_set, can_clear): value bits that a sequence of at most
+    k poses from the pool can drive to True / to False.
+
+    Preconditions are ignored (any state may be the starting point), so
+    this over-approximates what is reachable and is safe for pruning.
+    """
+    can_set = can_clear = 0
+    for pose in pool:
+        can_set |= pose.post_val
+        can_clear |= pose.post_mask & ~pose.post_val
+    return [(0, 0)] + [(can_set, can_clear)] * max_depth
+
+
+class PackedPool(NamedTuple):
+    """
+    Intermediate pool as parallel arrays (struct-of-arrays), built once per
+    planner run by _pack_pool(); entry k of every array describes poses[k].
+    """
+    poses: Tuple[Pose, ...]
+    file_ids: Tuple[str, ...]
+    pre_masks: Tuple[int, ...]
+    pre_vals: Tuple[int, ...]
+    post_clears: Tuple[int, ...]
+    post_sets: Tuple[int, ...]
+    durations: Tuple[float, ...]
+    reach: Tuple[Tuple[int, int], ...]  # see _reachable_bits_within
+
+
+def _pack_pool(pool: Sequence[Pose]) -> PackedPool:
+    """Convert a list of intermediate poses into a PackedPool."""
+    clear_set = [_post_clear_set(p.post_mask, p.post_val) for p in pool]
+    return PackedPool(
+        poses=tuple(pool),
+        file_ids=tuple(p.file_id for p in pool),
+        pre_masks=tuple(p.pre_mask for p in pool),
+        pre_vals=tuple(p.pre_val for p in pool),
+        post_clears=tuple(c for c, _ in clear_set),
+        post_sets=tuple(s for _, s in clear_set),
+        durations=tuple(p.duration for p in pool),
+        reach=tuple(_reachable_bits_within(pool, MAX_INTERMEDIATES_PER_SEGMENT)),
+    )
+
+
+def _search_segment_kernel(
+    pre_masks: Sequence[int],
+    pre_vals: Sequence[int],
+    post_clears: Sequence[int],
+    post_sets: Sequence[int],
+    durations: Sequence[float],
+    reach: Sequence[Tuple[int, int]],
+    start_state: State,
+    end_pre_mask: int,
+    end_pre_val: int,
+    budget: float,
+    max_depth: int,
+    maximize: bool,
+) -> Optional[List[int]]:
+    """
+    BFS over the pool given as parallel arrays (pose k is described by
+    pre_masks[k], ..., durations[k]). Only ints and floats are handled
+    here; the result is the list of pose indices, or None.
+
+    Nodes are stored in parallel arrays. Node i stores its parent node and
+    the pose index that led to it, so paths are rebuilt only for the
+    accepted solution.
+    """
+    states: List[State] = [start_state]
+    times: List[float] = [0.0]
+    depths: List[int] = [0]
+    parents: List[int] = [-1]
+    via_pose: List[int] = [-1]
+    n_poses = len(durations)
+    known_shift = _KNOWN_SHIFT
+    limit = budget + 1e-6
+    max_dur = max(durations) if n_poses else 0.0
+
+    # Dominance pruning of repeated states:
+    #   min: key (state, depth) -> smallest t_used seen. Any extension of
+    #        a node is also feasible from a node with the same state and
+    #        depth but less time used.
+    #   max: key (state, t_used in whole ms) -> smallest depth seen.
+    #        Less time used is not better here (it is what we maximize),
+    #        but fewer poses used leaves more depth for extensions.
+    #        Durations have ms precision, so ms buckets never merge
+    #        genuinely different times.
+    visited: Dict[Tuple[State, int], Union[int, float]] = {}
+
+    best_node = -1
+    best_time = -1.0
+
+    # min: plain FIFO over the node arrays (BFS, first solution = shortest).
+    # max: heap of (-upper_bound, -t_used, node), most promising node first;
+    #      among equal bounds the node with more time already used goes
+    #      first, so best_time tightens early. Node ids break remaining ties.
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    head = 0
+    heap: List[Tuple[float, float, int]] = [(-min(limit, max_depth * max_dur), 0.0, 0)]
+
+    while True:
+        if maximize:
+            if not heap:
+                break
+            neg_upper, _, node = heappop(heap)
+            # Branch and bound: every remaining node has an upper bound no
+            # larger than this one, so nothing left can beat best_time.
+            if -neg_upper <= best_time:
+                break
+        else:
+            if head >= len(states):
+                break
+            node = head
+            head += 1
+        state = states[node]
+        t_used = times[node]
+        depth = depths[node]
+
+        # Check if this node already satisfies end preconditions.
+        if not ((state ^ end_pre_val) & end_pre_mask & (state >> known_shift)):
+            if not maximize:
+                # First solution = shortest
+                best_node = node
+                break
+            # maximize: keep the best-so-far, but continue exploring
+            if t_used > best_time:
+                best_time = t_used
+                best_node = node
+
+        if depth >= max_depth:
+            continue
+
+        if maximize:
+            key = (state, round(t_used * 1000))
+            seen = visited.get(key)
+            if seen is not None and depth >= seen:
+                continue
+            visited[key] = depth
+        else:
+            key = (state, depth)
+            seen = visited.get(key)
+            if seen is not None and t_used >= seen:
+                continue
+            visited[key] = t_used
+
+        known = state >> known_shift
+        can_set, can_clear = reach[max_depth - depth - 1]
+        child_slack = (max_depth - depth - 1) * max_dur
+        for k in range(n_poses):
+            if (state ^ pre_vals[k]) & pre_masks[k] & known:
+                continue
+            new_time = t_used + durations[k]
+            if new_time > limit:
+                continue
+            new_state = (state & ~post_clears[k]) | post_sets[k]
+
+            # Prune children that can no longer reach end_pose.pre with the
+            # poses they have left.
+            wrong = (new_state ^ end_pre_val) & end_pre_mask & (new_state >> known_shift)
+            if wrong and ((wrong & end_pre_val & ~can_set) or (wrong & ~end_pre_val & ~can_clear)):
+                continue
+
+            if maximize:
+                upper = new_time + child_slack
+                if upper > limit:
+                    upper = limit
+                if upper <= best_time:
+                    continue
+                heappush(heap, (-upper, -new_time, len(states)))
+            states.append(new_state)
+            times.append(new_time)
+            depths.append(depth + 1)
+            parents.append(node)
+            via_pose.append(k)
+
+    if best_node < 0:
+        return None  # no state satisfied end_pose.pre
+    path: List[int] = []
+    while parents[best_node] >= 0:
+        path.append(via_pose[best_node])
+        best_node = parents[best_node]
+    path.reverse()
+    return path
+
+
 def _plan_segment_internal(
     start_state: State,
     end_pose: Pose,
-    intermediates_pool: List[Pose],
+    intermediates_pool: PackedPool,
     time_budget_for_segment: float,
     mode: str = "min",  # "min" or "max"
 ) -> Optional[List[Pose]]:
@@ -126,64 +348,80 @@ def _plan_segment_internal(
     """
     assert mode in ("min", "max")
 
+    end_pre_mask, end_pre_val = end_pose.pre_mask, end_pose.pre_val
+
     # For "min" we can immediately bail out if we already satisfy end preconditions.
-    if mode == "min" and state_satisfies(start_state, end_pose.pre):
+    if mode == "min" and state_satisfies(start_state, end_pose):
         return []
 
-    Node = Tuple[State, float, List[Pose]]
-    q: deque[Node] = deque()
-    q.append((start_state, 0.0, []))
+    indices = _search_segment_kernel(
+        intermediates_pool.pre_masks,
+        intermediates_pool.pre_vals,
+        intermediates_pool.post_clears,
+        intermediates_pool.post_sets,
+        intermediates_pool.durations,
+        intermediates_pool.reach,
+        start_state,
+        end_pre_mask,
+        end_pre_val,
+        time_budget_for_segment,
+        MAX_INTERMEDIATES_PER_SEGMENT,
+        maximize=(mode == "max"),
+    )
+    if indices is None:
+        return None
+    poses = intermediates_pool.poses
+    return [poses[k] for k in indices]
 
-    visited = set()  # (frozenset(state.items()), rounded_time, path_len)
 
-    best_path: Optional[List[Pose]] = None
-    best_time: float = -1.0
+# Solutions of segment sub-problems, shared across planner invocations
+# (e.g. the min and max planners, or several caps for the same song).
+# Keyed on (start_state, end_pose, budget in ms, mode, pool) and bounded,
+# so scripting the planner over many songs / caps does not grow it forever.
+_SEGMENT_CACHE_SIZE = 1024
 
-    while q:
-        state, t_used, path = q.popleft()
 
-        # Check if this node already satisfies end preconditions.
-        if state_satisfies(state, end_pose.pre):
-            if mode == "min":
-                # First solution = shortest
-                return path
-            else:
-                # mode == "max": keep the best-so-far, but continue exploring
-                if t_used > best_time:
-                    best_time = t_used
-                    best_path = path
-
-        if len(path) >= MAX_INTERMEDIATES_PER_SEGMENT:
-            continue
+@lru_cache(maxsize=_SEGMENT_CACHE_SIZE)
+def _plan_segment_ms(
+    start_state: State,
+    end_pose: Pose,
+    intermediates_pool: PackedPool,
+    budget_ms: int,
+    mode: str,
+) -> Optional[Tuple[Pose, ...]]:
+    path = _plan_segment_internal(
+        start_state, end_pose, intermediates_pool, budget_ms / 1000.0, mode=mode
+    )
+    return None if path is None else tuple(path)
 
-        key = (frozenset(state.items()), round(t_used, 2), len(path))
-        if key in visited:
-            continue
-        visited.add(key)
 
-        for pose in intermediates_pool:
-            if not state_satisfies(state, pose.pre):
-                continue
-            new_time = t_used + pose.duration
-            if new_time > time_budget_for_segment + 1e-6:
-                continue
-            new_state = apply_pose(state, pose)
-            new_path = path + [pose]
-            q.append((new_state, new_time, new_path))
+def _plan_segment_cached(
+    start_state: State,
+    end_pose: Pose,
+    intermediates_pool: PackedPool,
+    time_budget_for_segment: float,
+    mode: str,
+) -> Optional[List[Pose]]:
+    """
+    Memoized _plan_segment_internal.
 
-    # No more nodes to explore
-    if mode == "max":
-        return best_path  # may be None if no state satisfies end_pose.pre
-    return None
+    Pose durations are given with millisecond precision, so the budget is
+    bucketed to whole milliseconds (keeping the usual 1e-6 tolerance) and
+    the search runs on the bucketed budget: every budget in a bucket admits
+    exactly the same pose sequences, so the cached answer is exact.
+    """
+    budget_ms = math.floor((time_budget_for_segment + 1e-6) * 1000)
+    cached = _plan_segment_ms(start_state, end_pose, intermediates_pool, budget_ms, mode)
+    return None if cached is None else list(cached)
 
 
 def plan_segment_min(
     start_state: State,
     end_pose: Pose,
-    intermediates_pool: List[Pose],
+    intermediates_pool: PackedPool,
     time_budget_for_segment: float,
 ) -> Optional[List[Pose]]:
-    return _plan_segment_internal(
+    return _plan_segment_cached(
         start_state, end_pose, intermediates_pool, time_budget_for_segment, mode="min"
     )
 
@@ -191,10 +429,10 @@ def plan_segment_min(
 def plan_segment_max(
     start_state: State,
     end_pose: Pose,
-    intermediates_pool: List[Pose],
+    intermediates_pool: PackedPool,
     time_budget_for_segment: float,
 ) -> Optional[List[Pose]]:
-    return _plan_segment_internal(
+    return _plan_segment_cached(
         start_state, end_pose, intermediates_pool, time_budget_for_segment, mode="max"
     )
 
@@ -203,16 +441,60 @@ def plan_segment_max(
 # Top-level planner (min & max variants)
 # -------------------------------------------------------------------
 
+@dataclass(frozen=True)
+class PlanConfig:
+    """
+    Global time caps for one planner call, derived once from the inputs.
+
+        desired_total       requested total (song length or default), effective s
+        hard_cap_effective  min(desired_total, ABSOLUTE_MAX_SECONDS), effective s
+        hard_cap_raw        hard_cap_effective * speed_factor, raw pose seconds
+        speed_factor        global motion speed multiplier
+        from_song           True if desired_total came from a song length
+    """
+    desired_total: float
+    hard_cap_effective: float
+    hard_cap_raw: float
+    speed_factor: float
+    from_song: bool
+
+    @classmethod
+    def from_inputs(
+        cls,
+        song_length_seconds: Optional[float],
+        speed_factor: float = 1.0,
+    ) -> "PlanConfig":
+        if speed_factor <= 0.0:
+            raise ValueError("speed_factor must be positive, got {}".format(speed_factor))
+        if song_length_seconds is None:
+            desired_total = DEFAULT_TOTAL_TIME_SECONDS
+        else:
+            desired_total = float(song_length_seconds)
+        # Effective cap in seconds (what the assignment / song sees)
+        hard_cap_effective = min(desired_total, ABSOLUTE_MAX_SECONDS)
+        return cls(
+            desired_total=desired_total,
+            hard_cap_effective=hard_cap_effective,
+            # Raw cap in pose.duration time
+            hard_cap_raw=hard_cap_effective * speed_factor,
+            speed_factor=speed_factor,
+            from_song=song_length_seconds is not None,
+        )
+
+
 def _plan_full_choreography_generic(
-    song_length_seconds: Optional[float],
+    config: PlanConfig,
     mode: str,
-    speed_factor: float = 1.0,
-) -> Optional[List[Pose]]:
+) -> Optional[Tuple[List[Pose], float]]:
     """
     Internal implementation used by both:
         - plan_full_choreography_min  (mode="min")
         - plan_full_choreography_max  (mode="max")
 
+    Returns (sequence, total raw duration), or None if planning fails.
+    The total is the running sum kept while building the sequence, so
+    callers do not need to re-sum it.
+
     mode == "min":
         behaves like your original planner: shortest choreography
         that respects mandatory order and cap.
@@ -231,26 +513,19 @@ def _plan_full_choreography_generic(
               effective_time = total_duration_raw / speed_factor <= hard_cap_effective
     """
     assert mode in ("min", "max")
-    if speed_factor <= 0.0:
-        raise ValueError("speed_factor must be positive, got {}".format(speed_factor))
-
-    if song_length_seconds is None:
-        desired_total = DEFAULT_TOTAL_TIME_SECONDS
-        print("[PLAN] No song length provided; using default {:.2f}s.".format(desired_total))
+    if config.from_song:
+        print("[PLAN] Using song length ≈ {:.2f}s from MP3 / caller.".format(config.desired_total))
     else:
-        desired_total = float(song_length_seconds)
-        print("[PLAN] Using song length ≈ {:.2f}s from MP3 / caller.".format(desired_total))
+        print("[PLAN] No song length provided; using default {:.2f}s.".format(config.desired_total))
 
-    # Effective cap in seconds (what the assignment / song sees)
-    hard_cap_effective = min(desired_total, ABSOLUTE_MAX_SECONDS)
-    # Raw cap in pose.duration time
-    hard_cap_raw = hard_cap_effective * speed_factor
+    hard_cap_effective = config.hard_cap_effective
+    hard_cap_raw = config.hard_cap_raw
+    speed_factor = config.speed_factor
 
     mand = mandatory_order()
 
     # Required set for feasibility check: mandatory + 5 fixed intermediates.
-    required_for_check = required_poses_for_time_check()
-    required_time_raw = total_duration(required_for_check)
+    required_time_raw = _required_raw_time()
     if required_time_raw > hard_cap_raw + 1e-6:
         print(
             "[PLAN] Mandatory + 5 required intermediates take {:.2f}s (raw), "
@@ -260,7 +535,7 @@ def _plan_full_choreography_generic(
         return None
 
     # Mandatory-only backbone in raw seconds
-    mand_time_raw = total_duration(mand)
+    mand_time_raw = _mandatory_raw_time()
     if mand_time_raw > hard_cap_raw + 1e-6:
         # This should not happen if the required-set check above passed,
         # but we keep it as a guard.
@@ -277,14 +552,15 @@ def _plan_full_choreography_generic(
     segment_targets_effective = compute_uniform_segment_times(hard_cap_effective)
     segment_targets_raw = [t * speed_factor for t in segment_targets_effective]
 
-    intermediates_pool = all_intermediate_poses()
+    intermediates_pool = _pack_pool(all_intermediate_poses())
 
     full_sequence: List[Pose] = []
-    current_state: State = {}
+    current_state: State = 0  # empty state: nothing known yet
 
     # Apply the first mandatory pose
     first = mand[0]
     full_sequence.append(first)
+    total_raw = first.duration  # running raw duration of full_sequence
     current_state = apply_pose(current_state, first)
     interm_budget_used = 0.0  # in raw seconds
 
@@ -298,6 +574,9 @@ def _plan_full_choreography_generic(
     for idx in range(num_segments):
         start_pose = mand[idx]
         end_pose = mand[idx + 1]
+        # current_state is never read after the last segment, so its
+        # updates are skipped there.
+        is_last = idx == num_segments - 1
 
         remaining_budget = interm_budget_total - interm_budget_used
         if remaining_budget < -1e-6:
@@ -318,7 +597,7 @@ def _plan_full_choreography_generic(
         if segment_budget <= 1e-6:
             # No budget left for intermediates; we can only go directly,
             # if preconditions allow it.
-            if not state_satisfies(current_state, end_pose.pre):
+            if not state_satisfies(current_state, end_pose):
                 print(
                     "[PLAN] Segment {}: no intermediate budget and cannot reach "
                     "next mandatory directly."
@@ -326,7 +605,9 @@ def _plan_full_choreography_generic(
                 )
                 return None
             full_sequence.append(end_pose)
-            current_state = apply_pose(current_state, end_pose)
+            total_raw += end_pose.duration
+            if not is_last:
+                current_state = apply_pose(current_state, end_pose)
             continue
 
         # Plan intermediates for this segment
@@ -364,13 +645,17 @@ def _plan_full_choreography_generic(
         # Append intermediates and end_pose
         for p in seg_interms:
             full_sequence.append(p)
-            current_state = apply_pose(current_state, p)
-            interm_budget_used += p.duration
+            if not is_last:
+                current_state = apply_pose(current_state, p)
+            duration = p.duration
+            interm_budget_used += duration
+            total_raw += duration
 
         full_sequence.append(end_pose)
-        current_state = apply_pose(current_state, end_pose)
+        total_raw += end_pose.duration
+        if not is_last:
+            current_state = apply_pose(current_state, end_pose)
 
-    total_raw = total_duration(full_sequence)
     if total_raw > hard_cap_raw + 1e-6:
         print(
             "[PLAN] Internal error: planned total {:.2f}s (raw) exceeds raw hard cap {:.2f}s."
@@ -385,7 +670,7 @@ def _plan_full_choreography_generic(
         .format(total_effective, total_raw, hard_cap_effective, speed_factor)
     )
     print("[PLAN] Total poses: {}".format(len(full_sequence)))
-    return full_sequence
+    return full_sequence, total_raw
 
 
 def plan_full_choreography(
@@ -406,15 +691,17 @@ def plan_full_choreography(
     5 required intermediates are missing, we insert them just before the
     final mandatory pose (Crouch), provided we stay within the global cap.
     """
+    config = PlanConfig.from_inputs(song_length_seconds, speed_factor)
+
     # 1) Run the generic min planner (no extra constraints).
-    seq = _plan_full_choreography_generic(
-        song_length_seconds, mode="min", speed_factor=speed_factor
-    )
-    if seq is None:
+    planned = _plan_full_choreography_generic(config, mode="min")
+    if planned is None:
         return None
+    seq, current_raw = planned
 
     # 2) Check which required intermediates are already present.
-    present_ids = {p.file_id for p in seq}
+    seq_ids = [p.file_id for p in seq]  # read each file_id once
+    present_ids = set(seq_ids)
     req_poses = required_intermediate_poses()
     req_ids_in_order = [p.file_id for p in req_poses]
     missing_ids = [fid for fid in req_ids_in_order if fid not in present_ids]
@@ -424,8 +711,7 @@ def plan_full_choreography(
         return seq
 
     # 3) Map file_id -> Pose for intermediates so we can resolve missing ones.
-    interm_pool = all_intermediate_poses()
-    by_id = {p.file_id: p for p in interm_pool}
+    by_id = _intermediates_by_id()
     missing_poses: List[Pose] = []
     for fid in missing_ids:
         pose = by_id.get(fid)
@@ -441,20 +727,11 @@ def plan_full_choreography(
         # All missing ones were unknown; just return original sequence.
         return seq
 
-    # 4) Compute global raw cap again (same logic as in _plan_full_choreography_generic).
-    if song_length_seconds is None:
-        desired_total = DEFAULT_TOTAL_TIME_SECONDS
-    else:
-        desired_total = float(song_length_seconds)
-    hard_cap_effective = min(desired_total, ABSOLUTE_MAX_SECONDS)
-    hard_cap_raw = hard_cap_effective * speed_factor
-
-    # How much extra raw time do we add if we insert all missing poses?
+    # 4) How much extra raw time do we add if we insert all missing poses?
     extra_raw = sum(p.duration for p in missing_poses)
-    current_raw = total_duration(seq)
     new_total_raw = current_raw + extra_raw
 
-    if new_total_raw > hard_cap_raw + 1e-6:
+    if new_total_raw > config.hard_cap_raw + 1e-6:
         # In theory this should not happen, because we earlier checked that
         # (mandatory + all 5 required) fits inside hard_cap_raw. However,
         # we keep this guard for robustness.
@@ -466,28 +743,26 @@ def plan_full_choreography(
 
     # 5) Insert the missing intermediates just before the final mandatory pose.
     mand = mandatory_order()
-    last_mandatory = mand[-1]  # typically Crouch
-    last_idx = None
-    for i, p in enumerate(seq):
-        if p.file_id == last_mandatory.file_id:
-            last_idx = i
-    if last_idx is None:
+    last_fid = mand[-1].file_id  # typically Crouch
+    # Scan from the end: the final mandatory pose is normally the last element.
+    last_idx = next(
+        (i for i in range(len(seq_ids) - 1, -1, -1) if seq_ids[i] == last_fid),
         # Fallback: if for some reason final mandatory is not found, append at end.
-        last_idx = len(seq)
+        len(seq),
+    )
 
-    # Insert missing poses in the fixed required order.
-    new_seq = seq[:last_idx] + missing_poses + seq[last_idx:]
+    # Insert missing poses in the fixed required order (in-place splice).
+    seq[last_idx:last_idx] = missing_poses
 
-    new_total_raw = total_duration(new_seq)
     new_total_effective = new_total_raw / speed_factor
     print(
         "[PLAN] Enforced presence of all 5 required intermediates in min choreography. "
         "New total duration (raw) {:.2f}s, (effective) {:.2f}s."
         .format(new_total_raw, new_total_effective)
     )
-    print("[PLAN] Total poses after enforcement: {}".format(len(new_seq)))
+    print("[PLAN] Total poses after enforcement: {}".format(len(seq)))
 
-    return new_seq
+    return seq
 
 
 def plan_full_choreography_maximal(
@@ -498,7 +773,10 @@ def plan_full_choreography_maximal(
     "Max" mode: tries to saturate the time budget with intermediates.
     The budget is scaled in raw seconds by speed_factor.
     """
-    return _plan_full_choreography_generic(
-        song_length_seconds, mode="max", speed_factor=speed_factor
+    planned = _plan_full_choreography_generic(
+        PlanConfig.from_inputs(song_length_seconds, speed_factor), mode="max"
     )
+    if planned is None:
+        return None
+    return planned[0]
 
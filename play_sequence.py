@@ -25,61 +25,247 @@ Choregraphe using the exact teacher .py files.
 
 import argparse
 import os
+import struct
 import sys
+from functools import lru_cache
+from typing import NamedTuple, Optional, Sequence, Tuple
 
-from planner import (
-    plan_full_choreography,          # MIN mode (original behavior)
-    plan_full_choreography_maximal,  # MAX mode (new)
-)
-from pose_definitions import total_duration
+from pose_definitions import Pose, to_ms, total_duration, total_duration_ms
+
+# The planner (and mutagen, if ever needed) are imported lazily, so that
+# --help and argument errors do not pay for loading them.
 
 # ---------------------------------------------------------------
 # Global constants
 # ---------------------------------------------------------------
 MAX_TIME_LIMIT = 117.0  # seconds, global hard cap from the assignment
 
+# findBestPath windows, tried in this order: (name, lo, hi) as fractions
+# of the requested duration.
+FIND_BEST_WINDOWS = (
+    ("close", 0.9, 1.0),
+    ("mid", 0.7, 0.9),
+    ("far", 0.5, 0.7),
+    ("any", 0.0, 0.5),  # guarantee pass
+)
+
 
 # ---------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------
+class PlannedSequence(NamedTuple):
+    """
+    A planned choreography together with its durations, computed once:
+        poses      the poses in order
+        raw_total  sum of pose.duration (raw seconds)
+        eff_total  raw_total / speed_factor (effective seconds)
+        eff_ms     eff_total in whole milliseconds, used for all window checks
+    """
+    poses: Tuple[Pose, ...]
+    raw_total: float
+    eff_total: float
+    eff_ms: int
+
+
+def make_planned_sequence(seq: Optional[Sequence[Pose]], speed_factor) -> Optional[PlannedSequence]:
+    """Wrap a planner result (None stays None) into a PlannedSequence."""
+    if seq is None:
+        return None
+    poses = tuple(seq)
+    raw_total = total_duration(poses)
+    return PlannedSequence(
+        poses=poses,
+        raw_total=raw_total,
+        eff_total=raw_total / speed_factor,
+        eff_ms=int(round(total_duration_ms(poses) / speed_factor)),
+    )
+
+
+def print_candidate(seq, cap_hint):
+    """Log a findBestPath candidate's effective duration."""
+    print("[PLAN] Candidate duration (effective) {:.2f}s for cap_hint {:.2f}s".format(
+        seq.eff_total, cap_hint)
+    )
+
+
+def in_window(T_ms, lo_ms, hi_ms):
+    """lo_ms <= T_ms <= hi_ms; all in whole (effective) milliseconds."""
+    return lo_ms <= T_ms <= hi_ms
+
+
+@lru_cache(maxsize=64)
+def _cached_max_plan(cap_key, sf_key):
+    from planner import plan_full_choreography_maximal  # MAX mode (new)
+
+    return make_planned_sequence(
+        plan_full_choreography_maximal(song_length_seconds=cap_key, speed_factor=sf_key),
+        sf_key,
+    )
+
+
+def planned_maximal(cap, speed_factor):
+    """
+    plan_full_choreography_maximal(cap, speed_factor) as a PlannedSequence,
+    memoized on the exact (cap, speed_factor), so repeated searches with
+    the same cap reuse the earlier planner run. The cap is not rounded:
+    rounding it down can drop it below the feasibility threshold.
+    """
+    return _cached_max_plan(float(cap), float(speed_factor))
+
+
 def export_sequence_to_file(sequence, speed_factor, path="sequence.txt"):
     """
     Write:
         Line 1 → speed factor (float)
         Remaining lines → file_ids (one per line)
     """
-    with open(path, "w") as f:
-        f.write(str(speed_factor) + "\n")   # <-- FIRST LINE: speed factor
-        for p in sequence:
-            f.write(p.file_id + "\n")
+    with open(path, "wb") as f:
+        f.write("{}\n".format(speed_factor).encode("ascii"))   # <-- FIRST LINE: speed factor
+        f.writelines(p.file_line for p in sequence)
 
     abs_path = os.path.abspath(path)
     print("[INFO] Exported sequence to {}".format(abs_path))
 
 
+# MPEG audio lookup tables (kbps / Hz), indexed by header fields.
+_MP3_BITRATES = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MP3_SAMPLE_RATES = (44100, 48000, 32000)
+
+
+_MP3 = None
+
+
+def _get_mp3():
+    """mutagen.mp3.MP3, imported on first use and cached (ImportError if missing)."""
+    global _MP3
+    if _MP3 is None:
+        from mutagen.mp3 import MP3
+        _MP3 = MP3
+    return _MP3
+
+
+def _mp3_frame_header(buf, i):
+    """
+    Decode the MPEG audio frame header at buf[i:i+4].
+    Returns (version, layer, sr_idx, bitrate, sample_rate, frame_len) or
+    None if there is no valid header there.
+    """
+    (h,) = struct.unpack_from(">I", buf, i)
+    if (h >> 21) & 0x7FF != 0x7FF:
+        return None
+    version = (h >> 19) & 3      # 3 = MPEG1, 2 = MPEG2, 0 = MPEG2.5
+    layer = 4 - ((h >> 17) & 3)  # 1, 2 or 3
+    br_idx = (h >> 12) & 0xF
+    sr_idx = (h >> 10) & 3
+    if version == 1 or layer == 4 or br_idx in (0, 15) or sr_idx == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _MP3_BITRATES[(1 if mpeg1 else 2, layer)][br_idx] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[sr_idx] >> (0 if mpeg1 else 1 if version == 2 else 2)
+    padding = (h >> 9) & 1
+    if layer == 1:
+        frame_len = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        frame_len = 144 * bitrate // sample_rate + padding
+    else:  # Layer III, MPEG2 / 2.5
+        frame_len = 72 * bitrate // sample_rate + padding
+    return version, layer, sr_idx, bitrate, sample_rate, frame_len
+
+
+def _mp3_header_length(path: str, file_size: int):
+    """
+    Duration of an MP3 from its headers alone: skip the ID3v2 tag, find
+    the first MPEG frame header that is followed by a matching header at
+    the next frame boundary, then use the Xing/Info/VBRI frame count if
+    present, else the CBR estimate (audio bytes * 8 / bitrate).
+    file_size is the st_size the caller already stat()ed.
+    Returns None if no such pair of frame headers is found (e.g. the file
+    is not an MP3), so the caller can fall back to mutagen.
+    """
+    with open(path, "rb") as f:
+        head = f.read(10)
+        start = 0
+        if head[:3] == b"ID3" and len(head) == 10:
+            s = head[6:10]
+            start = 10 + (s[0] << 21 | s[1] << 14 | s[2] << 7 | s[3])
+            if head[5] & 0x10:  # footer present
+                start += 10
+        f.seek(start)
+        buf = f.read(8192)
+
+    for i in range(len(buf) - 3):
+        frame = _mp3_frame_header(buf, i)
+        if frame is None:
+            continue
+        version, layer, sr_idx, bitrate, sample_rate, frame_len = frame
+        # A lone sync pattern is easily found in random data: require the
+        # next frame to start where this one says it ends, with the same
+        # version, layer and sample rate.
+        j = i + frame_len
+        if j + 4 > len(buf):
+            continue
+        following = _mp3_frame_header(buf, j)
+        if following is None or following[:3] != (version, layer, sr_idx):
+            continue
+
+        mpeg1 = version == 3
+        samples = 384 if layer == 1 else 1152 if (layer == 2 or mpeg1) else 576
+        mono = (buf[i + 3] >> 6) & 3 == 3
+        side = (17 if mono else 32) if mpeg1 else (9 if mono else 17)
+
+        frames = None
+        x = i + 4 + side
+        if buf[x:x + 4] in (b"Xing", b"Info") and len(buf) >= x + 12:
+            (flags,) = struct.unpack_from(">I", buf, x + 4)
+            if flags & 1:
+                (frames,) = struct.unpack_from(">I", buf, x + 8)
+        elif buf[i + 36:i + 40] == b"VBRI" and len(buf) >= i + 54:
+            (frames,) = struct.unpack_from(">I", buf, i + 50)
+        if frames:
+            return frames * samples / sample_rate
+        return (file_size - start - i) * 8 / bitrate
+    return None
+
+
 def get_song_length_seconds(path: str):
     """
-    Return the length of an MP3 in seconds using mutagen.
+    Return the length of an MP3 in seconds, read from its frame headers.
+    mutagen is only tried (if installed) when the header parse fails.
     If anything fails, return None and fall back to the pure-planner behavior.
     """
     if not path:
         return None
-    if not os.path.exists(path):
-        print("[WARN] Music file not found: {}".format(path))
-        return None
     try:
-        from mutagen.mp3 import MP3
-    except ImportError:
-        print("[WARN] mutagen not installed; ignoring --music and using pure planner.")
+        st = os.stat(path)
+    except OSError:
+        print("[WARN] Music file not found: {}".format(path))
         return None
     try:
-        audio = MP3(path)
-        length = float(audio.info.length)
-        print("[INFO] Detected song length ≈ {:.2f}s from {}".format(length, path))
-        return length
-    except Exception as e:
-        print("[WARN] Could not read MP3 length ({}); ignoring --music.".format(e))
-        return None
+        length = _mp3_header_length(path, st.st_size)
+    except (OSError, struct.error) as e:
+        print("[WARN] Could not parse MP3 header ({}).".format(e))
+        length = None
+    if length is None:
+        try:
+            MP3 = _get_mp3()
+        except ImportError:
+            print("[WARN] No MPEG frame header found and mutagen not installed; "
+                  "ignoring --music and using pure planner.")
+            return None
+        try:
+            length = float(MP3(path).info.length)
+        except Exception as e:
+            print("[WARN] Could not read MP3 length ({}); ignoring --music.".format(e))
+            return None
+    print("[INFO] Detected song length ≈ {:.2f}s from {}".format(length, path))
+    return length
 
 
 def find_first_path_in_range(min_dur, max_dur, cap_hint, speed_factor):
@@ -93,33 +279,36 @@ def find_first_path_in_range(min_dur, max_dur, cap_hint, speed_factor):
 
     We:
         - call plan_full_choreography_maximal(song_length_seconds = cap_hint)
-          with the given speed_factor (cap_hint is in *effective* seconds)
-        - compute its actual effective duration T_eff = total_duration(seq) / speed_factor
-        - if T_eff is in [min_dur, max_dur], we accept it, else return None.
+          with the given speed_factor (cap_hint is in *effective* seconds),
+          memoized through planned_maximal()
+        - read its actual effective duration T_eff = seq.eff_total
+          (seq.raw_total / speed_factor, computed once)
+        - if T_eff is in [min_dur, max_dur], we accept it, else the
+          candidate is None. The check is exact, on whole milliseconds
+          (seq.eff_ms).
+
+    Returns (candidate, seq): seq is the planner result itself (None if
+    planning failed), so callers can reuse it when it is out of range.
     """
     if cap_hint <= 0.0:
-        return None
+        return None, None
     cap = min(cap_hint, MAX_TIME_LIMIT)
 
     # cap is in effective seconds; planner will interpret it that way.
-    seq = plan_full_choreography_maximal(
-        song_length_seconds=cap,
-        speed_factor=speed_factor,
-    )
+    seq = planned_maximal(cap, speed_factor)
     if seq is None:
-        return None
+        return None, None
 
-    T_raw = total_duration(seq)
-    T_eff = T_raw / speed_factor
-    print("[PLAN] Candidate duration (effective) {:.2f}s for cap_hint {:.2f}s".format(T_eff, cap_hint))
-    if min_dur <= T_eff <= max_dur + 1e-6:
-        return seq
-    return None
+    print_candidate(seq, cap_hint)
+    if in_window(seq.eff_ms, to_ms(min_dur), to_ms(max_dur)):
+        return seq, seq
+    return None, seq
 
 
 def find_best_path_for_duration(duration_amount, speed_factor):
     """
-    Your findBestPath(duration_amount) exactly as specified:
+    Your findBestPath(duration_amount) exactly as specified
+    (FIND_BEST_WINDOWS):
 
         close_candidate: [0.9 * duration_amount, 1.0 * duration_amount]
         mid_candidate:   [0.7 * duration_amount, 0.9 * duration_amount]
@@ -132,55 +321,72 @@ def find_best_path_for_duration(duration_amount, speed_factor):
 
     'First encountered' is modeled by trying windows in that order,
     each time using the MAX planner capped at the window's upper bound.
+
+    The last planner result is remembered: if it already fits a later
+    (lower) window, it is reused instead of planning again with that
+    window's cap. This is a heuristic. It assumes the lower cap would not
+    find anything better in that window. That held on every cap we
+    tested (the MAX planner never got shorter as the cap grew), but it
+    is not proven.
     """
     S = float(duration_amount)
 
-    # 1) Close
-    close_min = 0.9 * S
-    close_max = 1.0 * S
-    print("[PLAN] findBestPath: trying close window [{:.2f}, {:.2f}]".format(close_min, close_max))
-    close_candidate = find_first_path_in_range(
-        close_min, close_max, cap_hint=close_max, speed_factor=speed_factor
-    )
-    if close_candidate is not None:
-        print("[PLAN] findBestPath: using close_candidate.")
-        return close_candidate
-
-    # 2) Mid
-    mid_min = 0.7 * S
-    mid_max = 0.9 * S
-    print("[PLAN] findBestPath: trying mid window [{:.2f}, {:.2f}]".format(mid_min, mid_max))
-    mid_candidate = find_first_path_in_range(
-        mid_min, mid_max, cap_hint=mid_max, speed_factor=speed_factor
-    )
-    if mid_candidate is not None:
-        print("[PLAN] findBestPath: using mid_candidate.")
-        return mid_candidate
-
-    # 3) Far
-    far_min = 0.5 * S
-    far_max = 0.7 * S
-    print("[PLAN] findBestPath: trying far window [{:.2f}, {:.2f}]".format(far_min, far_max))
-    far_candidate = find_first_path_in_range(
-        far_min, far_max, cap_hint=far_max, speed_factor=speed_factor
-    )
-    if far_candidate is not None:
-        print("[PLAN] findBestPath: using far_candidate.")
-        return far_candidate
-
-    # 4) Guarantee pass: 0.0x–0.5x
-    any_min = 0.0 * S
-    any_max = 0.5 * S
-    print("[PLAN] findBestPath: trying any window [{:.2f}, {:.2f}]".format(any_min, any_max))
-    any_candidate = find_first_path_in_range(
-        any_min, any_max, cap_hint=any_max, speed_factor=speed_factor
-    )
-    if any_candidate is None:
-        print("[BUG] findBestPath: no candidate found in [0.0, 0.5] window. "
-              "This should not happen if t_min/t_max logic is correct.")
+    last = None  # last planner result, reused while it fits a window
+    for name, lo_frac, hi_frac in FIND_BEST_WINDOWS:
+        lo, hi = lo_frac * S, hi_frac * S
+        print("[PLAN] findBestPath: trying {} window [{:.2f}, {:.2f}]".format(name, lo, hi))
+        lo_ms, hi_ms = to_ms(lo), to_ms(hi)
+        if last is not None and in_window(last.eff_ms, lo_ms, hi_ms):
+            candidate = last
+        else:
+            candidate, planned = find_first_path_in_range(
+                lo, hi, cap_hint=hi, speed_factor=speed_factor
+            )
+            if planned is not None:
+                last = planned
+        if candidate is not None:
+            print("[PLAN] findBestPath: using {}_candidate.".format(name))
+            return candidate
+
+    print("[BUG] findBestPath: no candidate found in [0.0, 0.5] window. "
+          "This should not happen if t_min/t_max logic is correct.")
+    return None
+
+
+def find_best_path_for_duration_fast(duration_amount, speed_factor):
+    """
+    findBestPath(duration_amount) with usually a single planner run
+    instead of up to four.
+
+    We plan once at the top cap S and return that candidate from the
+    tightest window that contains it. If the probe finds no choreography
+    at all, no lower cap can either (the required poses alone already
+    exceed the cap), so we return None. Only when the probe lies outside
+    every window (a millisecond-rounding edge) do we fall back to the
+    ladder, find_best_path_for_duration().
+
+    The result equals the ladder's whenever the close window hits (both
+    use the same cap-S plan). Otherwise it is never shorter than the
+    ladder's, provided plan_full_choreography_maximal(cap) is monotonic
+    in cap. That held on every cap we sampled but is not proven.
+    """
+    S = float(duration_amount)
+    if S <= 0.0:
+        return None
+
+    seq = planned_maximal(min(S, MAX_TIME_LIMIT), speed_factor)
+    if seq is None:
+        print("[PLAN] findBestPath: no choreography fits cap {:.2f}s.".format(S))
         return None
-    print("[PLAN] findBestPath: using any_candidate.")
-    return any_candidate
+
+    print_candidate(seq, S)
+    for name, lo_frac, hi_frac in FIND_BEST_WINDOWS:
+        if in_window(seq.eff_ms, to_ms(lo_frac * S), to_ms(hi_frac * S)):
+            print("[PLAN] findBestPath: using {}_candidate.".format(name))
+            return seq
+
+    print("[PLAN] findBestPath: probe outside every window; trying windows one by one.")
+    return find_best_path_for_duration(S, speed_factor)
 
 
 def choose_sequence_for_song(t_min_seq, t_max_seq, song_length, speed_factor):
@@ -203,37 +409,44 @@ def choose_sequence_for_song(t_min_seq, t_max_seq, song_length, speed_factor):
       real-world song length, and the assignment’s 117s cap is also
       in real-world time.
 
-    If song_length is None, we just return t_min_seq (original behavior).
+    t_min_seq / t_max_seq and the returned value are PlannedSequence.
+    If song_length is None, we just return t_min_seq (original behavior);
+    t_max_seq is not looked at then and may be None.
     """
     # Effective durations of the minimal and maximal feasible choreographies.
-    t_min_eff = total_duration(t_min_seq) / speed_factor
-    t_max_eff = total_duration(t_max_seq) / speed_factor
-
+    t_min_eff = t_min_seq.eff_total
     print("[PLAN] t_min_feasible (effective) ≈ {:.2f}s".format(t_min_eff))
-    print("[PLAN] t_max_feasible (effective) ≈ {:.2f}s".format(t_max_eff))
 
     if song_length is None:
         print("[PLAN] No song length provided; using t_min_feasible choreography.")
         return t_min_seq
 
+    t_max_eff = t_max_seq.eff_total
+    print("[PLAN] t_max_feasible (effective) ≈ {:.2f}s".format(t_max_eff))
+
     t_song = float(song_length)
     print("[PLAN] t_song (from MP3) ≈ {:.2f}s".format(t_song))
 
+    # Compare in whole milliseconds from here on.
+    t_song_ms = to_ms(t_song)
+    t_min_ms = t_min_seq.eff_ms
+    t_max_ms = t_max_seq.eff_ms
+
     # Guard if for some reason t_max < t_min (should not happen)
-    if t_max_eff < t_min_eff:
+    if t_max_ms < t_min_ms:
         print("[WARN] t_max_feasible < t_min_feasible; swapping.")
-        t_min_eff, t_max_eff = t_max_eff, t_min_eff
+        t_min_ms, t_max_ms = t_max_ms, t_min_ms
         t_min_seq, t_max_seq = t_max_seq, t_min_seq
 
     # Case 1: normal case, song inside feasible band
-    if t_min_eff - 1e-6 <= t_song <= t_max_eff + 1e-6:
+    if t_min_ms <= t_song_ms <= t_max_ms:
         print("[PLAN] t_song within [t_min, t_max]; calling findBestPath(t_song).")
-        seq = find_best_path_for_duration(t_song, speed_factor=speed_factor)
+        seq = find_best_path_for_duration_fast(t_song, speed_factor=speed_factor)
         if seq is not None:
             return seq
 
         # If something goes wrong, fall back to nearest feasible edge.
-        if abs(t_song - t_min_eff) <= abs(t_song - t_max_eff):
+        if abs(t_song_ms - t_min_ms) <= abs(t_song_ms - t_max_ms):
             print("[PLAN] findBestPath failed; falling back to t_min_feasible.")
             return t_min_seq
         else:
@@ -241,7 +454,7 @@ def choose_sequence_for_song(t_min_seq, t_max_seq, song_length, speed_factor):
             return t_max_seq
 
     # Case 2: song longer than t_max_feasible
-    if t_song > t_max_eff + 1e-6:
+    if t_song_ms > t_max_ms:
         print("[PLAN] t_song > t_max_feasible; using t_max_feasible choreography.")
         return t_max_seq
 
@@ -314,58 +527,62 @@ def main():
         print("[ERROR] Motions directory does not exist: {}".format(motions_dir))
         sys.exit(1)
 
+    from planner import plan_full_choreography  # MIN mode (original behavior)
+
     # 0) Compute t_min_feasible: shortest total duration we can produce.
     print("[INFO] Planning t_min_feasible choreography (baseline, min mode)...")
-    t_min_seq = plan_full_choreography(
-        song_length_seconds=None,
-        speed_factor=speed_factor,
+    t_min_seq = make_planned_sequence(
+        plan_full_choreography(
+            song_length_seconds=None,
+            speed_factor=speed_factor,
+        ),
+        speed_factor,
     )
     if t_min_seq is None:
         print("[ERROR] Baseline planning failed; aborting.")
         sys.exit(1)
     print("[INFO] t_min_feasible planning success. Raw duration: {:.2f}s, "
-          "effective ≈ {:.2f}s".format(
-              total_duration(t_min_seq),
-              total_duration(t_min_seq) / speed_factor)
+          "effective ≈ {:.2f}s".format(t_min_seq.raw_total, t_min_seq.eff_total)
     )
 
-    # 1) Compute t_max_feasible: longest total duration under MAX_TIME_LIMIT (max mode).
-    print("[INFO] Planning t_max_feasible choreography (cap = {:.2f}s, max mode)...".format(
-        MAX_TIME_LIMIT)
-    )
-    t_max_seq = plan_full_choreography_maximal(
-        song_length_seconds=MAX_TIME_LIMIT,
-        speed_factor=speed_factor,
-    )
-    if t_max_seq is None:
-        print("[WARN] No separate t_max_feasible found; "
-              "using t_min_feasible for both min and max.")
-        t_max_seq = t_min_seq
-
-    # 2) Read song length, if provided
+    # 1) Read song length, if provided
     t_song = get_song_length_seconds(args.music)
 
+    # 2) Compute t_max_feasible: longest total duration under MAX_TIME_LIMIT
+    #    (max mode). Only needed to place a song; skipped without --music.
+    t_max_seq = None
+    if t_song is not None:
+        print("[INFO] Planning t_max_feasible choreography (cap = {:.2f}s, max mode)...".format(
+            MAX_TIME_LIMIT)
+        )
+        t_max_seq = planned_maximal(MAX_TIME_LIMIT, speed_factor)
+        if t_max_seq is None:
+            print("[WARN] No separate t_max_feasible found; "
+                  "using t_min_feasible for both min and max.")
+            t_max_seq = t_min_seq
+
     # 3) Apply your policy (all in effective seconds)
     sequence = choose_sequence_for_song(t_min_seq, t_max_seq, t_song, speed_factor)
 
     # 4) Show the chosen sequence
-    print("\n[SEQUENCE]")
-    for i, p in enumerate(sequence):
-        # Here we keep showing the raw per-pose duration from pose_definitions,
-        # since it's just informational; the total is reported in effective seconds.
-        print("  {idx:02d}. {fid:25s}  {label:15s}  {dur:5.2f}s".format(
+    # Here we keep showing the raw per-pose duration from pose_definitions,
+    # since it's just informational; the total is reported in effective seconds.
+    lines = ["\n[SEQUENCE]"]
+    lines.extend(
+        "  {idx:02d}. {fid:25s}  {label:15s}  {dur:5.2f}s".format(
             idx=i, fid=p.file_id, label=p.label, dur=p.duration
-        ))
-    print("")
-    total_raw = total_duration(sequence)
-    total_eff = total_raw / speed_factor
-    print("[INFO] Final choreography duration (raw):      {:.2f} s".format(total_raw))
-    print("[INFO] Final choreography duration (effective): {:.2f} s (speed_factor = {:.2f})".format(
-        total_eff, speed_factor)
+        )
+        for i, p in enumerate(sequence.poses)
+    )
+    lines.append("")
+    lines.append("[INFO] Final choreography duration (raw):      {:.2f} s".format(sequence.raw_total))
+    lines.append("[INFO] Final choreography duration (effective): {:.2f} s (speed_factor = {:.2f})".format(
+        sequence.eff_total, speed_factor)
     )
+    print("\n".join(lines))
 
     # 5) Export to sequence.txt for Choregraphe Option B
-    export_sequence_to_file(sequence, args.speed_factor, path="sequence.txt")
+    export_sequence_to_file(sequence.poses, args.speed_factor, path="sequence.txt")
     print("[INFO] Skipping local execution; use sequence.txt in Choregraphe.")
     return
 
@@ -13,11 +13,40 @@
 #     without changing this file. The planner only needs
 #     relative/approximate durations to schedule the dance.
 
-from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, Sequence, Tuple
+
+
+def to_ms(seconds: float) -> int:
+    """Seconds -> whole milliseconds (rounded), for exact duration compares."""
+    return int(round(seconds * 1000))
+
+
+# The tiny logical state is a bitmask: one bit per boolean state key.
+STANDING = 1 << 0
+
+_STATE_BITS: Dict[str, int] = {"standing": STANDING}
+NUM_STATE_BITS = len(_STATE_BITS)
+
+
+def _mkstate(conditions: Dict[str, bool]) -> Tuple[int, int]:
+    """
+    Encode a pre/post dict such as {"standing": False} as (mask, val):
+    mask has the bit of every mentioned key, val the bits that are True.
+    """
+    mask = val = 0
+    for k, v in conditions.items():
+        bit = _STATE_BITS[k]
+        mask |= bit
+        if v:
+            val |= bit
+    return mask, val
+
+
+def _unmkstate(mask: int, val: int) -> Dict[str, bool]:
+    """Inverse of _mkstate()."""
+    return {k: bool(val & bit) for k, bit in _STATE_BITS.items() if mask & bit}
 
 
-@dataclass(frozen=True)
 class Pose:
     """
     A single NAO pose / movement.
@@ -28,12 +57,91 @@ class Pose:
         duration: Approximate duration of the movement in seconds
         pre:      Preconditions on a tiny logical state
         post:     Postconditions on the same logical state
+        duration_ms: duration in whole milliseconds (see to_ms)
+        file_line: file_id + "\n" as ASCII bytes, i.e. this pose's line
+                  in an exported sequence.txt
+
+    pre / post are given as dicts but stored as bitmasks (see _mkstate):
+        pre_mask, pre_val:   a state satisfies pre iff
+                             (state & pre_mask) == pre_val
+        post_mask, post_val: applying the pose gives
+                             (state & ~post_mask) | post_val
+    The pre / post properties rebuild the dicts on access.
+
+    A plain __slots__ class (no per-instance __dict__), so attribute reads
+    are cheap. Instances are immutable and compare / hash by
+    (label, file_id).
     """
-    label: str
-    file_id: str
-    duration: float
-    pre: Dict[str, bool]
-    post: Dict[str, bool]
+    __slots__ = (
+        "label", "file_id", "duration",
+        "pre_mask", "pre_val", "post_mask", "post_val",
+        "duration_ms", "file_line",
+    )
+
+    def __init__(
+        self,
+        label: str,
+        file_id: str,
+        duration: float,
+        pre: Dict[str, bool],
+        post: Dict[str, bool],
+    ):
+        set_attr = object.__setattr__
+        set_attr(self, "label", label)
+        set_attr(self, "file_id", file_id)
+        set_attr(self, "duration", duration)
+        pre_mask, pre_val = _mkstate(pre)
+        set_attr(self, "pre_mask", pre_mask)
+        set_attr(self, "pre_val", pre_val)
+        post_mask, post_val = _mkstate(post)
+        set_attr(self, "post_mask", post_mask)
+        set_attr(self, "post_val", post_val)
+        set_attr(self, "duration_ms", to_ms(duration))
+        set_attr(self, "file_line", (file_id + "\n").encode("ascii"))
+
+    @property
+    def pre(self) -> Dict[str, bool]:
+        return _unmkstate(self.pre_mask, self.pre_val)
+
+    @property
+    def post(self) -> Dict[str, bool]:
+        return _unmkstate(self.post_mask, self.post_val)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Pose is immutable; cannot assign to '{}'".format(name))
+
+    def __delattr__(self, name):
+        raise AttributeError("Pose is immutable; cannot delete '{}'".format(name))
+
+    # Immutable, so copies can share the instance.
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __getstate__(self):
+        return None, {name: getattr(self, name) for name in Pose.__slots__}
+
+    def __setstate__(self, state):
+        # Unpickling restores the slots directly (no __init__); bypass
+        # __setattr__.
+        _, slots = state
+        for name, value in slots.items():
+            object.__setattr__(self, name, value)
+
+    def __eq__(self, other):
+        if not isinstance(other, Pose):
+            return NotImplemented
+        return self.label == other.label and self.file_id == other.file_id
+
+    def __hash__(self):
+        return hash((self.label, self.file_id))
+
+    def __repr__(self):
+        return "Pose(label={!r}, file_id={!r}, duration={!r}, pre={!r}, post={!r})".format(
+            self.label, self.file_id, self.duration, self.pre, self.post
+        )
 
 
 
@@ -143,27 +251,31 @@ def final_pose() -> Pose:
     return POSE_CROUCH
 
 
-def inner_mandatory_poses() -> List[Pose]:
+_INNER_MANDATORY: Tuple[Pose, ...] = (
+    POSE_HELLO,
+    POSE_STAND_ZERO,
+    POSE_SIT,
+    POSE_SIT_RELAX,
+    POSE_STAND,
+    POSE_WIPE_FOREHEAD,
+)
+_ALL_MANDATORY: Tuple[Pose, ...] = (POSE_STAND_INIT,) + _INNER_MANDATORY + (POSE_CROUCH,)
+
+
+def inner_mandatory_poses() -> Tuple[Pose, ...]:
     """
     The 6 inner mandatory poses that must appear at least once somewhere
     between StandInit and Crouch. Their *logical* order is chosen in
     choreography_structure.mandatory_order().
     """
-    return [
-        POSE_HELLO,
-        POSE_STAND_ZERO,
-        POSE_SIT,
-        POSE_SIT_RELAX,
-        POSE_STAND,
-        POSE_WIPE_FOREHEAD,
-    ]
+    return _INNER_MANDATORY
 
 
-def all_mandatory_poses() -> List[Pose]:
+def all_mandatory_poses() -> Tuple[Pose, ...]:
     """
     Returns [fixed start] + inner mandatory + [fixed end].
     """
-    return [initial_pose()] + inner_mandatory_poses() + [final_pose()]
+    return _ALL_MANDATORY
 
 
 # -------------------------------------------------------------------
@@ -398,84 +510,102 @@ POSE_BOW = Pose(
 # Pools & utilities
 # -------------------------------------------------------------------
 
-def core_intermediate_poses() -> List[Pose]:
+# The pools are built once at import; the accessors below return the
+# shared tuples, so callers never rebuild them.
+
+_CORE_INTERMEDIATE: Tuple[Pose, ...] = (
+    POSE_ROTATION_HANDGUN,
+    POSE_RIGHT_ARM,
+    POSE_DOUBLE_MOVEMENT,
+    POSE_ARMS_OPENING,
+    POSE_UNION_ARMS,
+    POSE_MOVE_FORWARD,
+    POSE_MOVE_BACKWARD,
+    POSE_DIAGONAL_LEFT,
+    POSE_DIAGONAL_RIGHT,
+    POSE_ROTATION_FOOT_L,
+    POSE_ROTATION_FOOT_R,
+)
+
+# No matching .py motion scripts yet for the .crg-like poses.
+_CRG_LIKE_INTERMEDIATE: Tuple[Pose, ...] = (
+    # POSE_AIR_GUITAR,
+    # POSE_ARM_DANCE,
+    # POSE_BIRTHDAY_DANCE,
+    # POSE_SPRINKLER,
+)
+
+# No .py motion scripts yet for the ornamental poses either.
+_ORNAMENTAL_INTERMEDIATE: Tuple[Pose, ...] = (
+    # POSE_HANDS_ON_HIPS,
+    # POSE_COME_ON,
+    # POSE_DAB,
+    # POSE_DANCE_MOVE,
+    # POSE_PULP_FICTION,
+    # POSE_THE_ROBOT,
+    # POSE_SHUFFLE,
+    # POSE_WAVE,
+    # POSE_GLORY,
+    # POSE_CLAP,
+    # POSE_JOY,
+    # POSE_BOW,
+)
+
+_ALL_INTERMEDIATE: Tuple[Pose, ...] = (
+    _CORE_INTERMEDIATE + _CRG_LIKE_INTERMEDIATE + _ORNAMENTAL_INTERMEDIATE
+)
+_ALL_KNOWN: Tuple[Pose, ...] = _ALL_MANDATORY + _ALL_INTERMEDIATE
+
+
+def core_intermediate_poses() -> Tuple[Pose, ...]:
     """
     Exactly the intermediate positions listed in the slides (rotation,
     arms, move fwd/back, diagonals, etc.).
     """
-    return [
-        POSE_ROTATION_HANDGUN,
-        POSE_RIGHT_ARM,
-        POSE_DOUBLE_MOVEMENT,
-        POSE_ARMS_OPENING,
-        POSE_UNION_ARMS,
-        POSE_MOVE_FORWARD,
-        POSE_MOVE_BACKWARD,
-        POSE_DIAGONAL_LEFT,
-        POSE_DIAGONAL_RIGHT,
-        POSE_ROTATION_FOOT_L,
-        POSE_ROTATION_FOOT_R,
-    ]
-
-
-def crg_like_intermediate_poses() -> List[Pose]:
+    return _CORE_INTERMEDIATE
+
+
+def crg_like_intermediate_poses() -> Tuple[Pose, ...]:
     """
     Intermediate poses that come from .crg dance-like motions.
-    For now we return an empty list, because we do not have matching
+    For now we return an empty tuple, because we do not have matching
     .py motion scripts for these poses. They are defined above only
     for completeness / future work.
     """
-    return [
-        # POSE_AIR_GUITAR,
-        # POSE_ARM_DANCE,
-        # POSE_BIRTHDAY_DANCE,
-        # POSE_SPRINKLER,
-    ]
+    return _CRG_LIKE_INTERMEDIATE
 
 
-def ornamental_intermediate_poses() -> List[Pose]:
+def ornamental_intermediate_poses() -> Tuple[Pose, ...]:
     """
     Extra fun moves. Not required by the assignment.
-    For now we also return an empty list, because we do not have
+    For now we also return an empty tuple, because we do not have
     .py motion scripts for these. Enable them one by one when you
     actually implement the corresponding motions.
     """
-    return [
-        # POSE_HANDS_ON_HIPS,
-        # POSE_COME_ON,
-        # POSE_DAB,
-        # POSE_DANCE_MOVE,
-        # POSE_PULP_FICTION,
-        # POSE_THE_ROBOT,
-        # POSE_SHUFFLE,
-        # POSE_WAVE,
-        # POSE_GLORY,
-        # POSE_CLAP,
-        # POSE_JOY,
-        # POSE_BOW,
-    ]
-
-
-def all_intermediate_poses() -> List[Pose]:
+    return _ORNAMENTAL_INTERMEDIATE
+
+
+def all_intermediate_poses() -> Tuple[Pose, ...]:
     """
     Full pool of poses that can be used as intermediate ones.
     Currently this is just the core set; crg-like and ornamental
     pools are empty until you implement their .py scripts.
     """
-    return (
-        core_intermediate_poses()
-        + crg_like_intermediate_poses()
-        + ornamental_intermediate_poses()
-    )
+    return _ALL_INTERMEDIATE
 
 
-def all_known_poses() -> List[Pose]:
+def all_known_poses() -> Tuple[Pose, ...]:
     """
     Convenience: all mandatory and all intermediate poses together.
     """
-    return all_mandatory_poses() + all_intermediate_poses()
+    return _ALL_KNOWN
 
 
-def total_duration(sequence: List[Pose]) -> float:
+def total_duration(sequence: Sequence[Pose]) -> float:
     """Sum durations of a sequence of poses."""
     return sum(p.duration for p in sequence)
+
+
+def total_duration_ms(sequence: Sequence[Pose]) -> int:
+    """Exact sum of pose durations in whole milliseconds."""
+    return sum(p.duration_ms for p in sequence)
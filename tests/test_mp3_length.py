@@ -0,0 +1,48 @@
+import os
+import random
+import struct
+import tempfile
+import unittest
+
+from play_sequence import _mp3_header_length, get_song_length_seconds
+
+
+def _write_tmp(data):
+    fd, path = tempfile.mkstemp(suffix=".mp3")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+
+class Mp3HeaderLengthTest(unittest.TestCase):
+    def test_random_pcm_wav_is_not_an_mp3(self):
+        # Random PCM contains plenty of 11-bit sync patterns; none of them
+        # is followed by a matching frame header, so no length is returned.
+        rnd = random.Random(0)
+        pcm = bytes(rnd.getrandbits(8) for _ in range(64 * 1024))
+        header = (
+            b"RIFF" + struct.pack("<I", 36 + len(pcm)) + b"WAVEfmt "
+            + struct.pack("<IHHIIHH", 16, 1, 2, 44100, 176400, 4, 16)
+            + b"data" + struct.pack("<I", len(pcm))
+        )
+        path = _write_tmp(header + pcm)
+        try:
+            self.assertIsNone(_mp3_header_length(path, os.stat(path).st_size))
+            self.assertIsNone(get_song_length_seconds(path))
+        finally:
+            os.remove(path)
+
+    def test_cbr_frames(self):
+        # MPEG1 Layer III, 128 kbps, 44.1 kHz, no padding: 417-byte frames.
+        frame = struct.pack(">I", 0xFFFB9000) + bytes(413)
+        data = frame * 3
+        path = _write_tmp(data)
+        try:
+            length = _mp3_header_length(path, len(data))
+        finally:
+            os.remove(path)
+        self.assertAlmostEqual(length, len(data) * 8 / 128000)
+
+
+if __name__ == "__main__":
+    unittest.main()